@@ -1,28 +1,56 @@
 import requests
 import datetime
 import pytz
+import orjson
+from pathlib import Path
 
-def get_today_games():
-    today = datetime.datetime.now(pytz.timezone("US/Eastern")).strftime("%Y-%m-%d")
-    url = f"https://cdn.nba.com/static/json/staticData/scheduleLeagueV2.json"
+SCHEDULE_URL = "https://cdn.nba.com/static/json/staticData/scheduleLeagueV2.json"
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+CACHE_DIR = BASE_DIR / "outputs" / "_cache"
+SCHEDULE_CACHE = CACHE_DIR / "schedule.json"
+VALIDATORS_CACHE = CACHE_DIR / "schedule.validators.json"
+
+
+def fetch_schedule():
+    """Download the league schedule, reusing the cached copy on HTTP 304."""
+    headers = {}
+    if SCHEDULE_CACHE.exists() and VALIDATORS_CACHE.exists():
+        validators = orjson.loads(VALIDATORS_CACHE.read_bytes())
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
 
-    r = requests.get(url, timeout=10)
-    data = r.json()
+    r = requests.get(SCHEDULE_URL, headers=headers, timeout=10)
+    if r.status_code == 304:
+        return orjson.loads(SCHEDULE_CACHE.read_bytes())
+    r.raise_for_status()
 
-    games_today = []
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    SCHEDULE_CACHE.write_bytes(r.content)
+    VALIDATORS_CACHE.write_bytes(orjson.dumps({
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+    }))
+    return orjson.loads(r.content)
+
+
+def get_today_games():
+    today = datetime.datetime.now(pytz.timezone("US/Eastern")).strftime("%Y-%m-%d")
+    data = fetch_schedule()
 
-    for game in data["leagueSchedule"]["gameDates"]:
-        if game["gameDate"] == today:
-            for g in game["games"]:
-                if g["gameStatus"] == 1:  # scheduled, not started
-                    tip = g["gameTimeUTC"]
-                    games_today.append({
-                        "game_id": g["gameId"],
-                        "tipoff_utc": tip,
-                        "date": today
-                    })
+    by_date = {d["gameDate"]: d["games"] for d in data["leagueSchedule"]["gameDates"]}
 
-    return games_today
+    return [
+        {
+            "game_id": g["gameId"],
+            "tipoff_utc": g["gameTimeUTC"],
+            "date": today
+        }
+        for g in by_date.get(today, [])
+        if g["gameStatus"] == 1  # scheduled, not started
+    ]
 
 if __name__ == "__main__":
     print(get_today_games())
@@ -2,6 +2,16 @@ import os
 import subprocess
 import sys
 from datetime import datetime, timezone
+from pathlib import Path
+
+# Pipeline stages are imported and run in-process (one interpreter, one
+# pandas/sklearn import). Only the ingest step still runs as a subprocess.
+SRC_DIR = Path(__file__).resolve().parents[2] / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import build_features_real  # noqa: E402
+import build_model_dataset  # noqa: E402
+import model_minutes  # noqa: E402
 
 
 def run_cmd(cmd, check=True):
@@ -41,13 +51,13 @@ def main(date_override=None):
 
     # These steps should always run so you still get projections
     print("Building features...")
-    run_cmd("python src/build_features_real.py")
+    build_features_real.main()
 
     print("Building model dataset...")
-    run_cmd("python src/build_model_dataset.py")
+    build_model_dataset.main()
 
     print("Running minutes model...")
-    run_cmd("python src/model_minutes.py")
+    model_minutes.main()
 
 
 if __name__ == "__main__":
@@ -31,6 +31,7 @@ CREATE TABLE IF NOT EXISTS games (
     game_date      TEXT,
     home_team_id   INTEGER,
     away_team_id   INTEGER,
+    game_status    INTEGER,
     FOREIGN KEY (home_team_id) REFERENCES teams(team_id),
     FOREIGN KEY (away_team_id) REFERENCES teams(team_id)
 );
@@ -58,3 +59,4 @@ CREATE TABLE IF NOT EXISTS boxscores (
 -- Simple index examples (can expand later)
 CREATE INDEX IF NOT EXISTS idx_boxscores_player ON boxscores(player_id);
 CREATE INDEX IF NOT EXISTS idx_boxscores_game   ON boxscores(game_id);
+CREATE INDEX IF NOT EXISTS idx_games_date       ON games(game_date);
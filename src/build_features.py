@@ -43,28 +43,24 @@ def compute_fantasy_points(df: pd.DataFrame) -> pd.Series:
 # ---------------------------
 
 def add_rolling_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Compute rolling 10-game fantasy averages & consistency score."""
-    
-    df = df.sort_values(["player_id", "game_date"])
+    """
+    Compute rolling 10-game fantasy averages & consistency score.
+    Expects df already sorted by player_id, game_date.
+    """
 
-    # Rolling 10-game fantasy average
-    df["fppg_last_10"] = (
-        df.groupby("player_id")["fantasy_points"]
+    # Rolling 10-game fantasy mean + std dev in one grouped pass
+    rolled = (
+        df.groupby("player_id", sort=False)["fantasy_points"]
         .rolling(10)
-        .mean()
+        .agg(["mean", "std"])
         .reset_index(level=0, drop=True)
     )
 
-    # Consistency score (rolling std dev)
-    df["consistency_score"] = (
-        df.groupby("player_id")["fantasy_points"]
-        .rolling(10)
-        .std()
-        .reset_index(level=0, drop=True)
-    )
+    # Rolling 10-game fantasy average
+    df["fppg_last_10"] = rolled["mean"]
 
-    # Normalize so higher is better (invert std dev)
-    df["consistency_score"] = 1 / (1 + df["consistency_score"])
+    # Consistency score, normalized so higher is better (invert std dev)
+    df["consistency_score"] = 1 / (1 + rolled["std"])
 
     return df
 
@@ -81,7 +77,7 @@ def compute_dvp(df: pd.DataFrame) -> pd.DataFrame:
             mean fantasy points allowed
     """
     dvp = (
-        df.groupby(["opponent_team_id", "position"])["fantasy_points"]
+        df.groupby(["opponent_team_id", "position"], sort=False)["fantasy_points"]
         .mean()
         .rename("dvp")
         .reset_index()
@@ -120,7 +116,8 @@ def build_features():
         "turnovers": [3, 1, 2, 2, 1]
     }
 
-    df = pd.DataFrame(data)
+    # Sort once up front; downstream groupbys rely on this order
+    df = pd.DataFrame(data).sort_values(["player_id", "game_date"]).reset_index(drop=True)
 
     print("Computing fantasy points...")
     df["fantasy_points"] = compute_fantasy_points(df)
@@ -7,14 +7,15 @@ Loads:
     - boxscores
 
 Outputs:
-    - /outputs/features.csv
+    - /outputs/features.parquet
+    - /outputs/features.csv (only when FEATURES_CSV=1)
 """
 
+import os
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from db import get_connection, init_db
-from math import radians, cos, sin, asin, sqrt
+from db import DB_PATH, get_connection, init_db
 
 # ---------------------------------------------------------
 # Correct Repo Root
@@ -23,87 +24,196 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 OUTPUT_DIR = BASE_DIR / "outputs"
 OUTPUT_DIR.mkdir(exist_ok=True, parents=True)
 
-FEATURE_OUTPUT = OUTPUT_DIR / "features.csv"
+FEATURE_OUTPUT = OUTPUT_DIR / "features.parquet"
+WRITE_CSV = os.getenv("FEATURES_CSV", "0") == "1"
+CACHE_DIR = OUTPUT_DIR / "_cache"
 
 # ---------------------------------------------------------
 # Team coordinates (approx arenas)
 # ---------------------------------------------------------
 TEAM_LOCATIONS = {
-    1610612737: (33.7573, -84.3963),
-    1610612738: (42.3663, -71.0622),
-    1610612739: (41.4965, -81.6882),
-    1610612740: (29.9490, -90.0821),
-    1610612741: (41.8807, -87.6742),
-    1610612742: (32.7905, -96.8104),
-    1610612743: (39.7487, -104.9955),
-    1610612744: (37.7680, -122.3877),
-    1610612745: (29.7508, -95.3621),
-    1610612746: (38.8981, -77.0209),
-    1610612747: (34.0430, -118.2673),
-    1610612748: (25.7814, -80.1870),
-    1610612749: (43.0436, -87.9090),
-    1610612750: (44.9795, -93.2760),
-    1610612751: (40.6827, -73.9757),
-    1610612752: (40.7505, -73.9934),
-    1610612753: (28.5392, -81.3839),
-    1610612754: (39.7684, -86.1581),
-    1610612755: (39.9012, -75.1720),
-    1610612756: (33.4457, -112.0712),
-    1610612757: (45.5316, -122.6668),
-    1610612758: (38.5802, -121.4997),
-    1610612759: (35.4634, -97.5151),
-    1610612760: (43.6435, -79.3791),
-    1610612762: (35.1382, -90.0506),
-    1610612764: (38.8981, -77.0209),
-    1610612765: (42.3411, -83.0553),
-    1610612766: (35.2271, -80.8431),
+    1610612737: (33.7573, -84.3963),   # ATL State Farm Arena
+    1610612738: (42.3663, -71.0622),   # BOS TD Garden
+    1610612739: (41.4965, -81.6882),   # CLE Rocket Mortgage FieldHouse
+    1610612740: (29.9490, -90.0821),   # NOP Smoothie King Center
+    1610612741: (41.8807, -87.6742),   # CHI United Center
+    1610612742: (32.7905, -96.8104),   # DAL American Airlines Center
+    1610612743: (39.7487, -105.0077),  # DEN Ball Arena
+    1610612744: (37.7680, -122.3877),  # GSW Chase Center
+    1610612745: (29.7508, -95.3621),   # HOU Toyota Center
+    1610612746: (33.9447, -118.3414),  # LAC Intuit Dome
+    1610612747: (34.0430, -118.2673),  # LAL Crypto.com Arena
+    1610612748: (25.7814, -80.1870),   # MIA Kaseya Center
+    1610612749: (43.0451, -87.9172),   # MIL Fiserv Forum
+    1610612750: (44.9795, -93.2760),   # MIN Target Center
+    1610612751: (40.6827, -73.9757),   # BKN Barclays Center
+    1610612752: (40.7505, -73.9934),   # NYK Madison Square Garden
+    1610612753: (28.5392, -81.3839),   # ORL Kia Center
+    1610612754: (39.7640, -86.1555),   # IND Gainbridge Fieldhouse
+    1610612755: (39.9012, -75.1720),   # PHI Wells Fargo Center
+    1610612756: (33.4457, -112.0712),  # PHX Footprint Center
+    1610612757: (45.5316, -122.6668),  # POR Moda Center
+    1610612758: (38.5802, -121.4997),  # SAC Golden 1 Center
+    1610612759: (29.4270, -98.4375),   # SAS Frost Bank Center
+    1610612760: (35.4634, -97.5151),   # OKC Paycom Center
+    1610612761: (43.6435, -79.3791),   # TOR Scotiabank Arena
+    1610612762: (40.7683, -111.9011),  # UTA Delta Center
+    1610612763: (35.1382, -90.0506),   # MEM FedExForum
+    1610612764: (38.8981, -77.0209),   # WAS Capital One Arena
+    1610612765: (42.3411, -83.0553),   # DET Little Caesars Arena
+    1610612766: (35.2251, -80.8392),   # CHA Spectrum Center
 }
 
+# Contiguous lookup arrays: TEAM_IDS is sorted, so searchsorted maps a
+# team id to its row in TEAM_LAT / TEAM_LON.
+TEAM_IDS = np.array(sorted(TEAM_LOCATIONS), dtype=np.int64)
+TEAM_LAT = np.array([TEAM_LOCATIONS[t][0] for t in TEAM_IDS], dtype=np.float32)
+TEAM_LON = np.array([TEAM_LOCATIONS[t][1] for t in TEAM_IDS], dtype=np.float32)
+
 # ---------------------------------------------------------
 # Travel calculation
 # ---------------------------------------------------------
-def haversine(lat1, lon1, lat2, lon2):
+def haversine_vec(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; accepts arrays/Series of coordinates."""
     R = 6371  # km
-    d_lat = radians(lat2 - lat1)
-    d_lon = radians(lon2 - lon1)
-    a = sin(d_lat/2)**2 + cos(radians(lat1))*cos(radians(lat2))*sin(d_lon/2)**2
-    return 2 * R * asin(sqrt(a))
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    d_lat = lat2 - lat1
+    d_lon = lon2 - lon1
+    a = np.sin(d_lat/2)**2 + np.cos(lat1)*np.cos(lat2)*np.sin(d_lon/2)**2
+    return 2 * R * np.arcsin(np.sqrt(a))
+
+def team_coords(team_ids):
+    """Gather (lat, lon) arrays for a column of team ids; unknown/missing → NaN."""
+    ids = np.asarray(team_ids, dtype=np.float64)
+    idx = np.searchsorted(TEAM_IDS, ids).clip(max=len(TEAM_IDS) - 1)
+    known = TEAM_IDS[idx] == ids
+    lat = np.where(known, np.take(TEAM_LAT, idx), np.nan)
+    lon = np.where(known, np.take(TEAM_LON, idx), np.nan)
+    return lat, lon
+
+# ---------------------------------------------------------
+# Grouped rolling mean
+# ---------------------------------------------------------
+def group_starts(keys) -> np.ndarray:
+    """Row offsets where each run of equal keys begins (keys must be sorted)."""
+    keys = np.asarray(keys)
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+
+def rolling_mean_grouped(values, starts, window):
+    """
+    Trailing `window`-row mean within each group of a sorted array.
+
+    Equivalent to groupby(...).rolling(window).mean(): NaN until a full
+    window of non-missing values is available. Uses prefix sums, so every
+    (column, window) pair is a handful of vectorized passes.
+    """
+    vals = np.asarray(values, dtype=np.float64)
+    n = len(vals)
+    valid = ~np.isnan(vals)
+    csum = np.r_[0.0, np.cumsum(np.where(valid, vals, 0.0))]
+    ccount = np.r_[0, np.cumsum(valid)]
+
+    row_start = np.repeat(starts, np.diff(np.r_[starts, n]))
+    hi = np.arange(1, n + 1)
+    lo = np.maximum(hi - window, row_start)
+
+    out = (csum[hi] - csum[lo]) / window
+    out[(ccount[hi] - ccount[lo]) < window] = np.nan
+    return out
 
 # ---------------------------------------------------------
 # Minute parser
 # ---------------------------------------------------------
-def parse_minutes(m):
-    """Convert 'mm:ss' to float minutes."""
-    if m is None or pd.isna(m):
-        return 0
-    if isinstance(m, (int, float)):
-        return float(m)
-    try:
-        mins, secs = map(int, str(m).split(":"))
-        return mins + secs / 60
-    except:
-        return 0
+def parse_minutes(minutes: pd.Series) -> pd.Series:
+    """Convert a column of 'mm:ss' strings to float minutes (missing/bad → 0)."""
+    if pd.api.types.is_numeric_dtype(minutes):
+        return minutes.astype("float64").fillna(0.0)
+
+    s = minutes.astype("string")
+    split = s.str.split(":", n=1, expand=True).reindex(columns=[0, 1])
+    mins = pd.to_numeric(split[0], errors="coerce")
+    secs = pd.to_numeric(split[1], errors="coerce").fillna(0)
+    return (mins + secs / 60).fillna(0.0).astype("float64")
+
+# ---------------------------------------------------------
+# Boxscore dtypes (counts/fp fit in float32, NBA ids in int32)
+# ---------------------------------------------------------
+STAT_COLS = [
+    "points", "rebounds", "assists", "steals", "blocks", "turnovers",
+    "field_goals_made", "field_goals_attempted",
+    "three_points_made", "three_points_attempted",
+    "free_throws_made", "free_throws_attempted",
+    "dk_fp",
+]
+ID_COLS = ["player_id", "team_id", "opponent_team_id"]
+
+
+def downcast_boxscores(box: pd.DataFrame) -> pd.DataFrame:
+    """Narrow boxscore stat/id columns to halve memory traffic downstream."""
+    stat_cols = [c for c in STAT_COLS if c in box.columns]
+    id_cols = [c for c in ID_COLS if c in box.columns]
+    box[stat_cols] = box[stat_cols].astype("float32")
+    box[id_cols] = box[id_cols].astype("int32")
+    return box
 
 # ---------------------------------------------------------
 def load_raw():
     with get_connection() as conn:
         games = pd.read_sql("SELECT * FROM games", conn, parse_dates=["game_date"])
         box = pd.read_sql("SELECT * FROM boxscores", conn)
+    return games, downcast_boxscores(box)
+
+
+def load_raw_cached():
+    """
+    Same as load_raw(), but keeps a Parquet snapshot of both tables keyed
+    on the DB file's mtime so unchanged data skips the SQL round-trip.
+    WAL frames are checkpointed into the main file first, so the key
+    reflects committed data (opening a WAL connection rewrites -wal, so
+    its mtime would change on every run).
+    """
+    conn = get_connection()
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    stamp = DB_PATH.stat().st_mtime_ns
+    games_path = CACHE_DIR / f"games_{stamp}.parquet"
+    box_path = CACHE_DIR / f"boxscores_{stamp}.parquet"
+
+    if games_path.exists() and box_path.exists():
+        return pd.read_parquet(games_path), pd.read_parquet(box_path)
+
+    games, box = load_raw()
+
+    CACHE_DIR.mkdir(exist_ok=True, parents=True)
+    for stale in CACHE_DIR.glob("*.parquet"):
+        stale.unlink()
+    games.to_parquet(games_path, compression="zstd")
+    box.to_parquet(box_path, compression="zstd")
     return games, box
 
 # ---------------------------------------------------------
 def build_features():
     print("Loading raw DB data...")
-    games, box = load_raw()
+    games, box = load_raw_cached()
 
     print("Cleaning data...")
 
     df = box.merge(games, on="game_id", how="left")
 
+    # --- Opponent = whichever side of the game the player's team isn't ---
+    home = df["home_team_id"].to_numpy()
+    df["opponent_team_id"] = np.where(
+        df["team_id"].to_numpy() == home, df["away_team_id"].to_numpy(), home
+    )
+
     # --- Fix minutes column ---
-    df["minutes"] = df["minutes"].apply(parse_minutes)
+    df["minutes"] = parse_minutes(df["minutes"]).astype("float32")
 
-    df = df.sort_values(["player_id", "game_date"])
+    # Sort once; every groupby below keeps this order (sort=False)
+    df = df.sort_values(["player_id", "game_date"]).reset_index(drop=True)
 
     # -------------------- Fantasy Points --------------------
     df["fantasy_points"] = (
@@ -116,38 +226,48 @@ def build_features():
     )
 
     print("Computing rolling stats...")
-    df["fp_last_5"] = df.groupby("player_id")["fantasy_points"].rolling(5).mean().reset_index(0, drop=True)
-    df["fp_last_10"] = df.groupby("player_id")["fantasy_points"].rolling(10).mean().reset_index(0, drop=True)
-    df["minutes_last_5"] = df.groupby("player_id")["minutes"].rolling(5).mean().reset_index(0, drop=True)
+    starts = group_starts(df["player_id"])
+    df["fp_last_5"] = rolling_mean_grouped(df["fantasy_points"], starts, 5)
+    df["fp_last_10"] = rolling_mean_grouped(df["fantasy_points"], starts, 10)
+    df["minutes_last_5"] = rolling_mean_grouped(df["minutes"], starts, 5)
+
+    # -------------------- Previous Game --------------------
+    # One grouped shift gives rest days and travel their "previous game" inputs
+    prev = (
+        df.groupby("player_id", sort=False)[["game_date", "game_id", "home_team_id"]]
+        .shift(1)
+        .add_prefix("prev_")
+    )
+    df["prev_game_date"] = prev["prev_game_date"]
+    df["prev_game_id"] = prev["prev_game_id"]
 
     # -------------------- Rest Days --------------------
     print("Computing rest days...")
-    df["prev_game_date"] = df.groupby("team_id")["game_date"].shift(1)
     df["days_rest"] = (df["game_date"] - df["prev_game_date"]).dt.days
 
     # -------------------- Travel Distance --------------------
     print("Computing travel...")
 
-    def compute_travel(row):
-        team = row["team_id"]
-        prev_date = row["prev_game_date"]
-
-        if pd.isna(prev_date):
-            return 0
-
-        lat1, lon1 = TEAM_LOCATIONS.get(team, (0, 0))
-        lat2, lon2 = TEAM_LOCATIONS.get(team, (0, 0))
-
-        return haversine(lat1, lon1, lat2, lon2)
+    # Games are played at the home team's arena, so travel is the distance
+    # between the player's previous venue and the current one.
+    curr_lat, curr_lon = team_coords(df["home_team_id"])
+    prev_lat, prev_lon = team_coords(prev["prev_home_team_id"])
 
-    df["travel_km"] = df.apply(compute_travel, axis=1)
+    travel = haversine_vec(prev_lat, prev_lon, curr_lat, curr_lon)
+    df["travel_km"] = np.nan_to_num(travel, nan=0.0)
 
     # -------------------- Save Output --------------------
     print(f"Saving features → {FEATURE_OUTPUT}")
-    df.to_csv(FEATURE_OUTPUT, index=False)
+    df.to_parquet(FEATURE_OUTPUT, index=False, compression="zstd")
+    if WRITE_CSV:
+        df.to_csv(FEATURE_OUTPUT.with_suffix(".csv"), index=False)
     print("Done!")
 
 # ---------------------------------------------------------
-if __name__ == "__main__":
+def main():
     init_db()
     build_features()
+
+
+if __name__ == "__main__":
+    main()
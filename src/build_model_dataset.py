@@ -1,21 +1,38 @@
+import json
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
-FEATURE_PATH = BASE_DIR / "outputs" / "features.csv"
-OUTPUT_PATH = BASE_DIR / "outputs" / "model_dataset.csv"
-TRAIN_PATH = BASE_DIR / "outputs" / "train.csv"
-TEST_PATH = BASE_DIR / "outputs" / "test.csv"
+FEATURE_PATH = BASE_DIR / "outputs" / "features.parquet"
+OUTPUT_PATH = BASE_DIR / "outputs" / "model_dataset.parquet"
+SPLIT_PATH = BASE_DIR / "outputs" / "model_dataset_split.json"
+
+# Explicit types for the CSV fallback (ids keep leading zeros, dates parse once)
+FEATURE_CSV_TYPES = {
+    "game_id": pa.string(),
+    "prev_game_id": pa.string(),
+    "game_date": pa.timestamp("ns"),
+    "prev_game_date": pa.timestamp("ns"),
+}
 
 # ----------------------------------------------------------
 # 1. Load Features
 # ----------------------------------------------------------
 
 def load_features():
-    if not FEATURE_PATH.exists():
-        raise FileNotFoundError(f"Missing features: {FEATURE_PATH}")
-    return pd.read_csv(FEATURE_PATH, parse_dates=["game_date"])
+    if FEATURE_PATH.exists():
+        return pd.read_parquet(FEATURE_PATH, engine="pyarrow")
+
+    # Fall back to a CSV-only feature build, read with pyarrow's C++ reader
+    csv_path = FEATURE_PATH.with_suffix(".csv")
+    if csv_path.exists():
+        convert = pacsv.ConvertOptions(column_types=FEATURE_CSV_TYPES)
+        return pacsv.read_csv(csv_path, convert_options=convert).to_pandas()
+
+    raise FileNotFoundError(f"Missing features: {FEATURE_PATH}")
 
 # ----------------------------------------------------------
 # 2. Clean + Filter
@@ -53,11 +70,9 @@ def select_columns(df):
     # Feature candidates = all numeric columns except target
     feature_cols = [c for c in df.columns if c not in ignore_cols]
 
-    # Sanity: remove completely-NA columns
-    feature_cols = [
-        c for c in feature_cols
-        if not df[c].isna().all()
-    ]
+    # Sanity: remove completely-NA columns (one pass over the frame)
+    all_na = df.isna().all()
+    feature_cols = [c for c in feature_cols if not all_na[c]]
 
     return df, target, feature_cols
 
@@ -65,40 +80,43 @@ def select_columns(df):
 # 4. Train/Test Split
 # ----------------------------------------------------------
 
-def train_test_split(df, cutoff_date=None):
+def split_cutoff(df, cutoff_date=None):
     """
     If cutoff_date=None:
        → split by time (80% old → train, 20% recent → test)
-    """
 
-    df = df.sort_values("game_date")
+    Only the cutoff is needed downstream (it goes in the split sidecar), so
+    train/test sizes come from a boolean mask instead of copied frames.
+    """
 
     if cutoff_date is None:
-        # 80% date-based split
-        cutoff_index = int(len(df) * 0.80)
-        cutoff_date = df.iloc[cutoff_index]["game_date"]
+        # 80% date-based split: sort just the date column, not the frame
+        dates = np.sort(df["game_date"].to_numpy())
+        cutoff_date = pd.Timestamp(dates[int(len(dates) * 0.80)])
 
-    train = df[df["game_date"] <= cutoff_date].copy()
-    test = df[df["game_date"] > cutoff_date].copy()
+    n_train = int((df["game_date"] <= cutoff_date).sum())
 
-    print("Train rows:", len(train))
-    print("Test rows:", len(test))
+    print("Train rows:", n_train)
+    print("Test rows:", len(df) - n_train)
     print("Cutoff date:", cutoff_date)
 
-    return train, test, cutoff_date
+    return cutoff_date
 
 # ----------------------------------------------------------
 # 5. Save
 # ----------------------------------------------------------
 
-def save(train, test, full):
-    full.to_csv(OUTPUT_PATH, index=False)
-    train.to_csv(TRAIN_PATH, index=False)
-    test.to_csv(TEST_PATH, index=False)
+def save(full, cutoff_date):
+    """
+    Write the full dataset once; train/test are recovered from it as
+    game_date <= / > the cutoff date stored in the split sidecar.
+    """
+    full.to_parquet(OUTPUT_PATH, index=False, compression="zstd")
+    with open(SPLIT_PATH, "w", encoding="utf-8") as f:
+        json.dump({"cutoff": str(cutoff_date)}, f)
 
     print(f"Saved full model dataset → {OUTPUT_PATH}")
-    print(f"Saved train → {TRAIN_PATH}")
-    print(f"Saved test → {TEST_PATH}")
+    print(f"Saved split cutoff → {SPLIT_PATH}")
 
 # ----------------------------------------------------------
 # Main
@@ -118,10 +136,10 @@ def main():
     print(f"Feature count: {len(feature_cols)}")
 
     print("Splitting train/test...")
-    train, test, cutoff_date = train_test_split(df)
+    cutoff_date = split_cutoff(df)
 
     print("Saving...")
-    save(train, test, df)
+    save(df, cutoff_date)
 
     print("Model dataset build complete.")
 
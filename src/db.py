@@ -14,11 +14,37 @@ DB_PATH = BASE_DIR / "data" / "nba_forecasting.db"
 SCHEMA_PATH = BASE_DIR / "sql" / "schema.sql"
 
 
-def get_connection() -> sqlite3.Connection:
-    """Create a SQLite connection with the correct path."""
+def configure_connection(conn: sqlite3.Connection) -> None:
+    """
+    Apply WAL journaling + throughput PRAGMAs. WAL is persistent in the
+    DB file, so it is only switched on when not already active, and is
+    skipped for in-memory databases.
+    """
+    # Only takes effect while the file is still empty (before WAL is set)
+    conn.execute("PRAGMA page_size=8192")
+
+    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    if journal_mode.lower() not in ("wal", "memory"):
+        conn.execute("PRAGMA journal_mode=WAL")
+
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-131072")  # 128 MB page cache
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+
+
+def get_connection(row_factory=None) -> sqlite3.Connection:
+    """
+    Create a SQLite connection with the correct path. Rows come back as
+    plain tuples; pass row_factory=sqlite3.Row for dict-like access.
+    """
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)  # ensure /data exists
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # lets you treat rows like dicts
+    # Larger statement cache: ingest reuses the same INSERTs across a run;
+    # longer timeout so parallel backfill workers wait out each other's writes
+    conn = sqlite3.connect(DB_PATH, cached_statements=256, timeout=30)
+    if row_factory:
+        conn.row_factory = row_factory
+    configure_connection(conn)
     return conn
 
 
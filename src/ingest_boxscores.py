@@ -1,14 +1,75 @@
 #!/usr/bin/env python3
+import os
 import time
 import random
-import sqlite3
+import threading
+import orjson
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+from contextlib import contextmanager
 from datetime import datetime
-from nba_api.stats.endpoints import ScoreboardV3, BoxScoreTraditionalV3
-from nba_api.stats.library.http import NBAStatsHTTP
 
-
-DB_PATH = "data/nba_forecasting.db"
+from db import get_connection
+from nba_http import (
+    HTTP_CACHE_TTL, RATE_LIMIT, cache_ttl, get_stats_json, may_be_live_cached, set_rate_limit,
+)
+from scoring import compute_fantasy_points_dk
+
+
+FETCH_WORKERS = 6  # threads fetching + parsing boxscores per date
+MAX_IN_FLIGHT = 4  # of those, how many may have a request open at once
+BACKFILL_PROCESSES = 4  # dates ingested in parallel by backfill()
+
+# Nightly cron is the only writer: hold one exclusive lock for the whole run
+# instead of taking/releasing file locks per transaction. Leave unset for
+# backfill() or while anything else reads the DB.
+EXCLUSIVE_LOCK = os.getenv("NBA_EXCLUSIVE", "0") == "1"
+
+# boxscoretraditionalv3 player column → boxscores table column
+BOX_COLUMNS = {
+    "gameId": "game_id",
+    "personId": "player_id",
+    "teamId": "team_id",
+    "minutes": "minutes",
+    "points": "points",
+    "reboundsTotal": "rebounds",
+    "assists": "assists",
+    "steals": "steals",
+    "blocks": "blocks",
+    "turnovers": "turnovers",
+    "fieldGoalsMade": "field_goals_made",
+    "fieldGoalsAttempted": "field_goals_attempted",
+    "threePointersMade": "three_points_made",
+    "threePointersAttempted": "three_points_attempted",
+    "freeThrowsMade": "free_throws_made",
+    "freeThrowsAttempted": "free_throws_attempted",
+}
+
+# Counting stats fit comfortably in int16
+BOX_COUNT_COLUMNS = [c for c in BOX_COLUMNS.values() if c not in
+                     ("game_id", "player_id", "team_id", "minutes")]
+
+# scoreboardv3 gameStatus: 1 = scheduled, 2 = in progress, 3 = final
+GAME_STATUS_FINAL = 3
+
+# Column order used for positional boxscore inserts
+BOX_TABLE_COLUMNS = list(BOX_COLUMNS.values()) + ["dk_fp"]
+
+# Built once at import; the identical strings hit the connection's statement cache
+_SQL_UPSERT_GAMES = (
+    "INSERT INTO games (game_id, game_date, home_team_id, away_team_id, game_status) "
+    "VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(game_id) DO UPDATE SET "
+    "game_date = excluded.game_date, "
+    "home_team_id = excluded.home_team_id, "
+    "away_team_id = excluded.away_team_id, "
+    "game_status = excluded.game_status;"
+)
+_SQL_INSERT_BOX = (
+    f"INSERT OR REPLACE INTO boxscores ({', '.join(BOX_TABLE_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(BOX_TABLE_COLUMNS))});"
+)
 
 
 # ============================================================
@@ -26,13 +87,18 @@ def log(msg: str):
 
 def retry_api_call(func, *args, retries=6, base_delay=2, **kwargs):
     """
-    Generic retry wrapper for NBA API calls.
+    Generic retry wrapper for NBA API calls. Backoff doubles per attempt
+    (capped at 60s) with 0.5x-1.5x jitter, so parallel fetchers that hit a
+    429 together spread their retries out instead of re-colliding.
     """
     for attempt in range(1, retries + 1):
         try:
             return func(*args, **kwargs)
         except Exception as e:
-            wait = base_delay * attempt + random.random() * 2
+            if attempt == retries:
+                log(f"[WARN] API failure (attempt {attempt}/{retries}): {e}.")
+                break
+            wait = min(60, base_delay * 2 ** (attempt - 1)) * (0.5 + random.random())
             log(f"[WARN] API failure (attempt {attempt}/{retries}): {e}. Retrying in {wait:.1f}s...")
             time.sleep(wait)
 
@@ -40,19 +106,50 @@ def retry_api_call(func, *args, retries=6, base_delay=2, **kwargs):
 
 
 def safe_scoreboard(game_date):
-    return retry_api_call(ScoreboardV3, game_date=game_date)
+    return retry_api_call(
+        get_stats_json,
+        "scoreboardv3",
+        {"GameDate": game_date, "LeagueID": "00"},
+        expire_after=cache_ttl(game_date),
+    )
+
+
+_box_slots = threading.Semaphore(MAX_IN_FLIGHT)
 
 
-def safe_boxscore(game_id):
-    return retry_api_call(BoxScoreTraditionalV3, game_id=game_id)
+def _get_boxscore_json(*args, **kwargs):
+    # Slot is held per attempt, so retry backoff sleeps don't block other games
+    with _box_slots:
+        return get_stats_json(*args, **kwargs)
+
+
+def safe_boxscore(game_id, expire_after=HTTP_CACHE_TTL, force_refresh=False):
+    return retry_api_call(
+        _get_boxscore_json,
+        "boxscoretraditionalv3",
+        {
+            "GameID": game_id,
+            "LeagueID": "00",
+            "StartPeriod": 0,
+            "EndPeriod": 0,
+            "StartRange": 0,
+            "EndRange": 0,
+            "RangeType": 0,
+        },
+        expire_after=expire_after,
+        force_refresh=force_refresh,
+    )
 
 
 # ============================================================
 # Database Helpers
 # ============================================================
 
-def init_db():
-    con = sqlite3.connect(DB_PATH)
+_schema_ready = False  # init_db() has run in this process
+
+
+def init_db(con):
+    global _schema_ready
     cur = con.cursor()
 
     # Games table
@@ -61,10 +158,16 @@ def init_db():
             game_id TEXT PRIMARY KEY,
             game_date TEXT,
             home_team_id INTEGER,
-            away_team_id INTEGER
+            away_team_id INTEGER,
+            game_status INTEGER
         );
     """)
 
+    # Older DBs (or sql/schema.sql's games table) predate game_status
+    game_cols = {row[1] for row in cur.execute("PRAGMA table_info(games);")}
+    if "game_status" not in game_cols:
+        cur.execute("ALTER TABLE games ADD COLUMN game_status INTEGER;")
+
     # Boxscores table
     cur.execute("""
         CREATE TABLE IF NOT EXISTS boxscores (
@@ -89,8 +192,53 @@ def init_db():
         );
     """)
 
+    # Feature builds look players up by id and slates by date
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_boxscores_player ON boxscores(player_id);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_games_date ON games(game_date);")
+
+    con.commit()
+    _schema_ready = True
+
+
+@contextmanager
+def bulk_load(con):
+    """
+    For large backfills: drop the secondary boxscore indexes while rows
+    are loaded, then rebuild each one in a single sorted pass and refresh
+    the query planner's statistics with ANALYZE.
+    """
+    indexes = con.execute(
+        "SELECT name, sql FROM sqlite_master "
+        "WHERE type = 'index' AND tbl_name = 'boxscores' AND sql IS NOT NULL"
+    ).fetchall()
+    for name, _ in indexes:
+        con.execute(f"DROP INDEX IF EXISTS {name}")
     con.commit()
-    con.close()
+
+    try:
+        yield
+    finally:
+        # Stored index SQL has no IF NOT EXISTS; skip any index something
+        # else (e.g. init_db in a worker) already recreated during the load
+        existing = {
+            name for (name,) in con.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+        for name, sql in indexes:
+            if name not in existing:
+                con.execute(sql)
+        con.execute("ANALYZE")
+        con.commit()
+
+
+def final_game_ids(con, date_str):
+    """game_ids stored for a date after the game went final (served by idx_games_date)."""
+    rows = con.execute(
+        "SELECT game_id FROM games WHERE game_date = ? AND game_status = ?;",
+        (date_str, GAME_STATUS_FINAL),
+    )
+    return {gid for (gid,) in rows}
 
 
 # ============================================================
@@ -99,105 +247,222 @@ def init_db():
 
 def fetch_game_ids(date_str):
     log(f"Fetching games for {date_str}...")
-    sb = safe_scoreboard(date_str)
-    meta, linescore, *_ = sb.get_data_frames()
+    data = orjson.loads(safe_scoreboard(date_str))
 
-    if "gameId" not in linescore.columns:
+    if "scoreboard" not in data:
         raise RuntimeError(f"ScoreboardV3 did not return game list for {date_str}")
+    games = data["scoreboard"]["games"]
 
-    game_ids = list(linescore["gameId"].unique())
+    game_ids = [g["gameId"] for g in games]
     log(f"Found {len(game_ids)} games.")
-    return game_ids, linescore
+    return game_ids, games
 
 
-def fetch_boxscore_and_teams(game_id):
-    log(f"  - Fetching boxscore {game_id}")
-    box = safe_boxscore(game_id)
+def _parse_box(raw):
+    """
+    Flatten raw BoxScoreTraditionalV3 JSON into PlayerStats tuples in
+    BOX_COLUMNS order, plus the (home, away) team ids. Plain dict/tuple
+    work; no nba_api endpoint object or intermediate DataFrames.
+    """
+    box = orjson.loads(raw).get("boxScoreTraditional") or {}
+    teams = [box.get("homeTeam"), box.get("awayTeam")]
+    if not all(teams):
+        raise RuntimeError("Boxscore is missing home/away team data")
 
-    dfs = box.get_data_frames()
-    if len(dfs) == 0:
-        raise RuntimeError(f"No boxscore data for game {game_id}")
+    stat_keys = list(BOX_COLUMNS)[3:]
+    rows = []
+    for team in teams:
+        for p in team.get("players", []):
+            stats = p["statistics"]
+            rows.append(
+                (box["gameId"], p["personId"], team["teamId"])
+                + tuple(stats.get(k) for k in stat_keys)
+            )
+
+    return rows, teams[0]["teamId"], teams[1]["teamId"]
 
-    df = dfs[0]
 
-    # Identify home/away teams
-    teams = df[["teamId"]].drop_duplicates()["teamId"].tolist()
-    if len(teams) != 2:
-        raise RuntimeError(f"Invalid number of teams in boxscore: {teams}")
+def fetch_boxscore_and_teams(game_id, expire_after=HTTP_CACHE_TTL, force_refresh=False):
+    log(f"  - Fetching boxscore {game_id}")
+    raw = safe_boxscore(game_id, expire_after, force_refresh)
+    rows, home_id, away_id = _parse_box(raw)
+    if not rows:
+        raise RuntimeError(f"No boxscore data for game {game_id}")
 
-    return df, teams[0], teams[1]
+    df = pd.DataFrame.from_records(rows, columns=list(BOX_COLUMNS))
+    return df, home_id, away_id
 
 
 # ============================================================
 # DB Insert Functions
 # ============================================================
 
-def upsert_game(game_id, date_str, home_team, away_team):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute("""
-        INSERT OR REPLACE INTO games (game_id, game_date, home_team_id, away_team_id)
-        VALUES (?, ?, ?, ?);
-    """, (game_id, date_str, home_team, away_team))
-    con.commit()
-    con.close()
-
-
-def insert_boxscores(df):
-    con = sqlite3.connect(DB_PATH)
-    df = df.copy()
-
-    # Convert "minutes" to float (if "MM:SS" convert → decimal)
-    def parse_minutes(val):
-        if isinstance(val, str) and ":" in val:
-            mm, ss = val.split(":")
-            return int(mm) + int(ss) / 60
-        return float(val)
-
-    df["minutes"] = df["minutes"].apply(parse_minutes)
-
-    # Compute DraftKings FP
-    df["dk_fp"] = (
-        df["points"]
-        + 1.25 * df["rebounds"]
-        + 1.5 * df["assists"]
-        + 2 * df["steals"]
-        + 2 * df["blocks"]
-        - df["turnovers"]
+def upsert_games(con, games):
+    """games: list of (game_id, game_date, home_team_id, away_team_id, game_status)."""
+    con.executemany(_SQL_UPSERT_GAMES, games)
+
+
+def prepare_boxscores(df):
+    """Map a PlayerStats frame onto the boxscores table columns."""
+    # rename() already returns a new frame, so no defensive .copy() first
+    df = df.loc[:, list(BOX_COLUMNS)].rename(columns=BOX_COLUMNS)
+
+    # Convert "minutes" to float ("MM:SS" → decimal; DNP "" / missing → 0)
+    split = (
+        df["minutes"].astype("string")
+        .str.split(":", n=1, expand=True)
+        .reindex(columns=[0, 1])
     )
+    mins = pd.to_numeric(split[0], errors="coerce")
+    secs = pd.to_numeric(split[1], errors="coerce").fillna(0)
+    df["minutes"] = (mins + secs / 60).fillna(0.0).astype("float64")
+
+    # Narrow counts to int16 (DNP rows may carry nulls → 0). Minutes stay
+    # float64 so decimal minutes don't pick up float32 noise in the DB.
+    df[BOX_COUNT_COLUMNS] = df[BOX_COUNT_COLUMNS].fillna(0).astype("int16")
+
+    # Compute DraftKings FP (quarter-point multiples: exact in float32)
+    df["dk_fp"] = compute_fantasy_points_dk(df).astype("float32")
 
-    df.to_sql("boxscores", con, if_exists="append", index=False)
-    con.close()
+    return df
+
+
+def insert_boxscores(con, df):
+    """
+    Bind rows as plain tuples in BOX_TABLE_COLUMNS order. Columns go through
+    tolist() (native Python scalars; sqlite3 can't bind numpy ints) and are
+    zipped lazily, so no per-row dicts or Series are built.
+    """
+    rows = zip(*(df[c].tolist() for c in BOX_TABLE_COLUMNS))
+    con.executemany(_SQL_INSERT_BOX, rows)
 
 
 # ============================================================
 # Master Ingestion Function
 # ============================================================
 
-def ingest_date(date_str):
-    init_db()
-    game_ids, meta = fetch_game_ids(date_str)
+def fetch_game(game_id, expire_after=HTTP_CACHE_TTL, force_refresh=False):
+    """Fetch + prepare one game's boxscore (runs in a worker thread)."""
+    df_box, t1, t2 = fetch_boxscore_and_teams(game_id, expire_after, force_refresh)
+    return prepare_boxscores(df_box), t1, t2
 
-    for gid in game_ids:
-        try:
-            df_box, t1, t2 = fetch_boxscore_and_teams(gid)
-            upsert_game(gid, date_str, t1, t2)
-            insert_boxscores(df_box)
-            time.sleep(0.6)
 
-        except Exception as e:
-            log(f"[ERROR] Failed to process game {gid}: {e}")
+def ingest_date(date_str):
+    # One connection for the whole date: schema check + batched writes share
+    # its prepared-statement cache.
+    con = get_connection()
+    try:
+        if EXCLUSIVE_LOCK:
+            # Takes effect on the next write; the lock is held until close()
+            con.execute("PRAGMA locking_mode=EXCLUSIVE")
+            con.execute("BEGIN EXCLUSIVE")
+            con.commit()
+        if not _schema_ready:
+            init_db(con)
+        game_ids, meta = fetch_game_ids(date_str)
+        status = {g["gameId"]: g.get("gameStatus") for g in meta}
+
+        # Games stored once they were final never change, so skip them. Rows
+        # written while a game was still live are re-fetched until final.
+        done = final_game_ids(con, date_str)
+        if done:
+            game_ids = [gid for gid in game_ids if gid not in done]
+            log(f"Skipping {len(done)} already-final games.")
+
+        # Fetch all games concurrently, then write the whole date in one transaction
+        games = []
+        frames = []
+
+        # A game about to be stored as final must not use a boxscore cached
+        # while it was live (the two responses expire at different moments).
+        # Only recent slates can hold such a copy; older ones keep the cache.
+        ttl = cache_ttl(date_str)
+        recent = may_be_live_cached(date_str)
+        refresh = {
+            gid for gid in game_ids
+            if recent and status.get(gid) == GAME_STATUS_FINAL
+        }
+
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+            futures = {
+                gid: pool.submit(fetch_game, gid, ttl, gid in refresh)
+                for gid in game_ids
+            }
+
+        for gid, future in futures.items():
+            try:
+                df_box, t1, t2 = future.result()
+                frames.append(df_box)
+                games.append((gid, date_str, t1, t2, status.get(gid)))
+
+            except Exception as e:
+                log(f"[ERROR] Failed to process game {gid}: {e}")
+
+        if games:
+            with con:
+                upsert_games(con, games)
+                insert_boxscores(con, pd.concat(frames, ignore_index=True))
+    finally:
+        con.close()
 
     log(f"Done ingesting {date_str}!")
 
 
+def _ingest_date_safe(date_str):
+    try:
+        ingest_date(date_str)
+    except Exception as e:
+        log(f"[ERROR] Failed to ingest {date_str}: {e}")
+
+
+def backfill(start, end, processes=BACKFILL_PROCESSES):
+    """
+    Ingest every date in [start, end]. Dates are independent, so they are
+    sharded across a process pool; each worker has its own HTTP session and
+    DB connection (WAL lets their short write transactions take turns), and
+    gets an equal slice of RATE_LIMIT so the aggregate stays under it.
+    """
+    dates = pd.date_range(start, end).strftime("%Y-%m-%d").tolist()
+    log(f"Backfilling {len(dates)} dates with {processes} processes...")
+
+    # Create the schema up front so the (forked) workers skip it
+    if not _schema_ready:
+        con = get_connection()
+        try:
+            init_db(con)
+        finally:
+            con.close()
+
+    with Pool(processes, initializer=set_rate_limit,
+              initargs=(RATE_LIMIT / processes,)) as pool:
+        pool.map(_ingest_date_safe, dates, chunksize=1)
+
+
 # ============================================================
 # Main Entry
 # ============================================================
 
 if __name__ == "__main__":
     import sys
-    if len(sys.argv) < 2:
-        raise RuntimeError("Usage: python ingest_boxscores.py YYYY-MM-DD")
-
-    ingest_date(sys.argv[1])
+    args = [a for a in sys.argv[1:] if a != "--bulk-load"]
+    if len(args) < 1:
+        raise RuntimeError(
+            "Usage: python ingest_boxscores.py YYYY-MM-DD [END-YYYY-MM-DD] [--bulk-load]"
+        )
+
+    def run():
+        if len(args) > 1:
+            backfill(args[0], args[1])
+        else:
+            ingest_date(args[0])
+
+    if "--bulk-load" in sys.argv:
+        con = get_connection()
+        try:
+            init_db(con)
+            with bulk_load(con):
+                run()
+        finally:
+            con.close()
+    else:
+        run()
@@ -9,10 +9,10 @@ Saves the model to models/minutes_model.pkl
 
 from pathlib import Path
 
-import pandas as pd
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
-import joblib
+
+from model_stats import load_model_dataset, save_model
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 PROCESSED_DIR = BASE_DIR / "data" / "processed"
@@ -21,9 +21,6 @@ MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def main():
-    data_path = PROCESSED_DIR / "model_dataset.csv"
-    df = pd.read_csv(data_path, parse_dates=["game_date"])
-
     feature_cols = [
         "minutes_last_5",
         "minutes_last_10",
@@ -33,6 +30,7 @@ def main():
         "usage_proxy",
         "dvp_last_20",
     ]
+    df = load_model_dataset(feature_cols + ["minutes"])
 
     X = df[feature_cols]
     y = df["minutes"]
@@ -50,7 +48,7 @@ def main():
     print(f"Minutes model R^2 - train: {train_score:.3f}, test: {test_score:.3f}")
 
     model_path = MODELS_DIR / "minutes_model.pkl"
-    joblib.dump(model, model_path)
+    save_model(model, len(feature_cols), model_path)
     print(f"Saved minutes model to {model_path}")
 
 
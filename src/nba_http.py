@@ -0,0 +1,155 @@
+"""
+nba_http.py
+
+Shared HTTP plumbing for stats.nba.com: request headers, one pooled and
+disk-cached session, and a rate limiter shared by every worker thread.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+from urllib3.util.retry import Retry
+
+STATS_URL = "https://stats.nba.com/stats"
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+HTTP_CACHE_PATH = BASE_DIR / "data" / "http_cache"
+HTTP_CACHE_TTL = timedelta(days=30)  # finished slates never change
+LIVE_CACHE_TTL = timedelta(seconds=120)  # today's/yesterday's games still can
+
+RATE_LIMIT = 5  # max stats.nba.com requests per second (all threads)
+
+# Browser-like headers stats.nba.com expects. No "Cache-Control: no-cache"
+# (it would make requests-cache skip every lookup) and no brotli, which
+# requests can't decode without an extra package.
+NBA_HEADERS = {
+    "Host": "stats.nba.com",
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "Referer": "https://stats.nba.com/",
+    "Origin": "https://stats.nba.com",
+}
+
+# One pooled keep-alive session per process for every stats.nba.com call, so
+# repeated requests reuse the TCP/TLS connection instead of re-handshaking.
+# Responses are cached on disk (SQLite), so re-running a backfill skips the
+# network. Built lazily and keyed on the PID: a forked backfill worker must
+# not reuse its parent's SQLite handle or sockets.
+_SESSION = None
+_SESSION_PID = None
+_session_lock = threading.Lock()
+
+
+class ThrottledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that spends rate-limit budget only on real network sends.
+    CachedSession reaches the adapter only on a cache miss, so responses
+    served from the disk cache are never throttled.
+    """
+
+    def send(self, request, **kwargs):
+        throttle()
+        return super().send(request, **kwargs)
+
+
+def _new_session():
+    session = CachedSession(
+        str(HTTP_CACHE_PATH),
+        backend="sqlite",
+        expire_after=HTTP_CACHE_TTL,
+        wal=True,  # backfill worker processes share the cache file
+    )
+    session.headers.update(NBA_HEADERS)
+    session.mount("https://", ThrottledAdapter(
+        pool_connections=8,
+        pool_maxsize=8,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504]),
+    ))
+    return session
+
+
+def get_session():
+    """This process's shared CachedSession (created on first use)."""
+    global _SESSION, _SESSION_PID
+    with _session_lock:
+        if _SESSION is None or _SESSION_PID != os.getpid():
+            _SESSION = _new_session()
+            _SESSION_PID = os.getpid()
+        return _SESSION
+
+
+# ============================================================
+# Rate Limiting
+# ============================================================
+
+_recent_calls = deque(maxlen=RATE_LIMIT)
+_rate_lock = threading.Lock()
+
+
+def throttle():
+    """
+    Block only when RATE_LIMIT requests were already sent in the last
+    second (shared across worker threads); otherwise return immediately.
+    """
+    with _rate_lock:
+        if len(_recent_calls) == _recent_calls.maxlen:
+            wait = 1.0 - (time.monotonic() - _recent_calls[0])
+            if wait > 0:
+                time.sleep(wait)
+        _recent_calls.append(time.monotonic())
+
+
+def set_rate_limit(per_second):
+    """Resize this process's request budget (e.g. split across a worker pool)."""
+    global _recent_calls
+    with _rate_lock:
+        _recent_calls = deque(maxlen=max(1, int(per_second)))
+
+
+# ============================================================
+# Requests
+# ============================================================
+
+def cache_ttl(date_str):
+    """Slates from the last day may still be in progress; older ones are final."""
+    recent = (datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%d")
+    return LIVE_CACHE_TTL if date_str >= recent else HTTP_CACHE_TTL
+
+
+def may_be_live_cached(date_str):
+    """
+    Whether a cached response for this date could still be a fresh snapshot
+    taken mid-game. Those are stored under LIVE_CACHE_TTL, so only inside
+    cache_ttl's live window; one extra day of slack covers the window edge.
+    """
+    cutoff = (datetime.utcnow() - timedelta(days=2)).strftime("%Y-%m-%d")
+    return date_str >= cutoff
+
+
+def get_stats_json(endpoint, params, expire_after=HTTP_CACHE_TTL, force_refresh=False):
+    """
+    GET a stats.nba.com endpoint and return the raw JSON bytes.
+    force_refresh skips the cache lookup and overwrites the cached copy.
+    Only cache misses are throttled (see ThrottledAdapter).
+    """
+    r = get_session().get(
+        f"{STATS_URL}/{endpoint}",
+        params=params,
+        timeout=30,
+        expire_after=expire_after,
+        force_refresh=force_refresh,
+    )
+    r.raise_for_status()
+    return r.content
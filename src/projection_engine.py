@@ -12,8 +12,10 @@ from pathlib import Path
 from datetime import datetime
 import os
 
+import numpy as np
 import pandas as pd
 import joblib
+import onnxruntime as ort
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 PROCESSED_DIR = BASE_DIR / "data" / "processed"
@@ -31,6 +33,25 @@ def load_latest_features() -> pd.DataFrame:
     return latest
 
 
+def load_model(name: str):
+    """
+    Return a predict(X) callable for models/<name>. Uses the ONNX export via
+    onnxruntime when present (float32, compiled trees), else the joblib pickle.
+    """
+    onnx_path = MODELS_DIR / f"{name}.onnx"
+    if not onnx_path.exists():
+        return joblib.load(MODELS_DIR / f"{name}.pkl").predict
+
+    sess = ort.InferenceSession(str(onnx_path), providers=["CPUExecutionProvider"])
+    input_name = sess.get_inputs()[0].name
+
+    def predict(X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return sess.run(None, {input_name: X})[0].ravel()
+
+    return predict
+
+
 def main(target_date: str | None = None):
     if target_date is None:
         target_date = datetime.today().strftime("%Y-%m-%d")
@@ -40,11 +61,11 @@ def main(target_date: str | None = None):
     df = load_latest_features()
 
     # Load models
-    minutes_model = joblib.load(MODELS_DIR / "minutes_model.pkl")
-    points_model = joblib.load(MODELS_DIR / "points_model.pkl")
-    rebounds_model = joblib.load(MODELS_DIR / "rebounds_model.pkl")
-    assists_model = joblib.load(MODELS_DIR / "assists_model.pkl")
-    fantasy_model = joblib.load(MODELS_DIR / "fantasy_model.pkl")
+    predict_minutes = load_model("minutes_model")
+    predict_points = load_model("points_model")
+    predict_rebounds = load_model("rebounds_model")
+    predict_assists = load_model("assists_model")
+    predict_fantasy = load_model("fantasy_model")
 
     feature_cols = [
         "minutes_last_5",
@@ -62,11 +83,11 @@ def main(target_date: str | None = None):
 
     X = df[feature_cols]
 
-    df["proj_minutes"] = minutes_model.predict(X)
-    df["proj_points"] = points_model.predict(X)
-    df["proj_rebounds"] = rebounds_model.predict(X)
-    df["proj_assists"] = assists_model.predict(X)
-    df["proj_fantasy_points"] = fantasy_model.predict(X)
+    df["proj_minutes"] = predict_minutes(X)
+    df["proj_points"] = predict_points(X)
+    df["proj_rebounds"] = predict_rebounds(X)
+    df["proj_assists"] = predict_assists(X)
+    df["proj_fantasy_points"] = predict_fantasy(X)
 
     # Save projections
     out_dir = PROJECTIONS_DIR / target_date
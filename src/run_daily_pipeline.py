@@ -14,44 +14,73 @@ End-to-end pipeline runner for GitHub Actions:
 """
 
 from datetime import datetime, timedelta
+import importlib
 import subprocess
 import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 
-
-def run(cmd: list[str]):
-    print(f"\n>>> Running: {' '.join(cmd)}")
-    result = subprocess.run(cmd, cwd=BASE_DIR, capture_output=True, text=True)
-    print(result.stdout)
-    if result.returncode != 0:
-        print(result.stderr, file=sys.stderr)
-        raise SystemExit(result.returncode)
+# Function each stage module exposes (default: main)
+ENTRY_POINTS = {"ingest_boxscores": "ingest_date"}
 
 
-def main():
+def run(cmd: list[str]):
+    print(f"\n>>> Running: {' '.join(cmd)}", flush=True)
+    # Stream the child's output line by line (stderr folded into stdout)
+    # so CI logs update live and nothing is buffered until exit.
+    with subprocess.Popen(
+        cmd,
+        cwd=BASE_DIR,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+    ) as proc:
+        for line in proc.stdout:
+            print(line, end="", flush=True)
+
+    if proc.returncode != 0:
+        raise SystemExit(proc.returncode)
+
+
+def run_stage(script: str, *args: str, isolate: bool = False):
+    """
+    Run one src/<script>.py stage. By default it is imported and called in
+    this interpreter, so pandas/numpy/sklearn are imported once for the
+    whole pipeline; isolate=True spawns a fresh `python` per stage instead.
+    """
+    if isolate:
+        run(["python", f"src/{script}.py", *args])
+        return
+
+    print(f"\n>>> Running: {script} {' '.join(args)}".rstrip())
+    module = importlib.import_module(script)
+    getattr(module, ENTRY_POINTS.get(script, "main"))(*args)
+
+
+def main(isolate: bool = False):
     today = datetime.today().date()
     yesterday = today - timedelta(days=1)
 
     # 1) Ingest yesterday's games
-    run(["python", "src/ingest_boxscores.py", yesterday.strftime("%Y-%m-%d")])
+    run_stage("ingest_boxscores", yesterday.strftime("%Y-%m-%d"), isolate=isolate)
 
     # 2) Build real features
-    run(["python", "src/build_features_real.py"])
+    run_stage("build_features_real", isolate=isolate)
 
     # 3) Build modeling dataset
-    run(["python", "src/build_model_dataset.py"])
+    run_stage("build_model_dataset", isolate=isolate)
 
     # 4) Train minutes model
-    run(["python", "src/model_minutes.py"])
+    run_stage("model_minutes", isolate=isolate)
 
     # 5) Train stats models
-    run(["python", "src/model_stats.py"])
+    run_stage("model_stats", isolate=isolate)
 
     # 6) Generate projections for today
-    run(["python", "src/projection_engine.py", today.strftime("%Y-%m-%d")])
+    run_stage("projection_engine", today.strftime("%Y-%m-%d"), isolate=isolate)
 
 
 if __name__ == "__main__":
-    main()
+    main(isolate="--isolate" in sys.argv[1:])
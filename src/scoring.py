@@ -0,0 +1,27 @@
+"""
+scoring.py
+
+DraftKings fantasy scoring used by ingest_boxscores to fill boxscores.dk_fp.
+The feature builders (build_features.py, build_features_real.py) still
+compute their own fantasy_points with different weights.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# ---------------------------
+# DraftKings scoring
+# ---------------------------
+
+DK_COLUMNS = ["points", "rebounds", "assists", "steals", "blocks", "turnovers"]
+DK_WEIGHTS = np.array([1.0, 1.25, 1.5, 2.0, 2.0, -1.0], dtype=np.float32)
+
+
+def compute_fantasy_points_dk(df: pd.DataFrame) -> pd.Series:
+    """Compute DraftKings-style fantasy points from boxscore columns."""
+    # One contiguous float32 (n, 6) matrix scored in a single contraction.
+    # Counts and quarter-point weights are exact in float32.
+    stats = np.ascontiguousarray(df[DK_COLUMNS].to_numpy(dtype=np.float32))
+    fp = np.einsum("ij,j->i", stats, DK_WEIGHTS, optimize=True)
+    return pd.Series(fp, index=df.index)